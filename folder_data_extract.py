@@ -1,40 +1,116 @@
 import tabula
 import pandas as pd
-import PyPDF2
+import pypdf
 import re
 import numpy as np
 import os
+import json
+import hashlib
+import csv
+import multiprocessing
+import shutil
+import tempfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 
+try:
+    # With jpype available, tabula keeps one JVM resident instead of starting java per call.
+    import jpype  # noqa: F401
+    _HAS_JPYPE = True
+except ImportError:
+    _HAS_JPYPE = False
 
-def extract_tables_from_pdf(file_path):
+_cache_dir = ".pdfcache"
+_CACHE_VERSION = 1  # Bump whenever extraction changes, so older cached results are not reused
+
+_OUTPUT_FIELDS = [
+    "Name",
+    "Publications_National",
+    "Publications_International",
+    "Submission #",
+    "Graduation GPA",
+    "Postgraduation GPA",
+    "Affiliations",
+]
+
+_NAME_RE = re.compile(r"Name\s*:\s*(.*)")
+_NAT_RE = re.compile(r"No\. of Publication National\s*:\s*(\d+)")
+_INT_RE = re.compile(r"No\. of Publication International\s*:\s*(\d+)")
+_FNAME_RE = re.compile(r"erecruitment-submission-(\d+)\.pdf$")
+
+# Fields read from the PDF text, in the order they are reported.
+_FIELDS = {
+    "Name": _NAME_RE,
+    "Publications_National": _NAT_RE,
+    "Publications_International": _INT_RE,
+}
+
+# The same fields as whole ASCII literals in the raw content stream, each ending its line.
+_RAW_NUMBER = rb"[-+]?[\d.]+"
+_RAW_NONZERO_NUMBER = rb"[-+]?(?=[\d.]*[1-9])[\d.]+"
+_RAW_FIELD_END = (
+    rb"\s*\)\s*(?:Tj|'|\")\s+"
+    rb"(?:ET|T\*|" + _RAW_NUMBER + rb"\s+" + _RAW_NONZERO_NUMBER + rb"\s+T[dD])"
+    rb"(?![^\s\[\]()<>{}/%])"
+)
+_RAW_FIELDS = {
+    "Name": re.compile(rb"\(\s*Name\s*:\s*((?:(?![()\\])[\x20-\x7e])+?)" + _RAW_FIELD_END),
+    "Publications_National": re.compile(rb"\(\s*No\. of Publication National\s*:\s*(\d+)" + _RAW_FIELD_END),
+    "Publications_International": re.compile(
+        rb"\(\s*No\. of Publication International\s*:\s*(\d+)" + _RAW_FIELD_END
+    ),
+}
+
+
+def _tables_from_json(json_path):
+    """Builds DataFrames from a tabula JSON export, using the first row of each table as header."""
+    with open(json_path, encoding="utf-8") as file:
+        raw_tables = json.load(file)
+
+    tables = []
+    for raw_table in raw_tables:
+        rows = [[cell["text"] or np.nan for cell in row] for row in raw_table["data"]]
+        if rows:
+            header = [cell["text"] for cell in raw_table["data"][0]]
+            tables.append(pd.DataFrame(rows[1:], columns=header))
+    return tables
+
+
+def extract_tables_from_pdf(file_path, json_path=None):
     """Extracts tables from a PDF into a dictionary of DataFrames.
 
     Args:
         file_path (str): The path to the PDF file.
+        json_path (str, optional): A tabula JSON export of the PDF to read instead of running tabula.
 
     Returns:
         dict: A dictionary where keys are table names ("table_1", "table_2", etc.) 
               and values are the corresponding DataFrames.
     """
-    table_dfs = {}
+    # Prefer the export from the batch conversion in main; only start tabula if there is none.
+    if json_path is not None:
+        all_tables = _tables_from_json(json_path)
+    else:
+        all_tables = tabula.read_pdf(file_path, pages="all", multiple_tables=True, lattice=True)
 
-    # Read all tables, handling potential table splits by merging them based on column names.
-    all_tables = tabula.read_pdf(file_path, pages="all", multiple_tables=True, lattice=True)
+    # Handle potential table splits by merging tables with the same column names in one concat.
+    fragments = {}
     for table in all_tables:
         df = pd.DataFrame(table)
-        if table_dfs and set(df.columns) == set(table_dfs["table_1"].columns):
-            # If columns match the first table, assume it's a continuation and concatenate.
-            table_dfs["table_1"] = pd.concat([table_dfs["table_1"], df])
-        else:
-            # Otherwise, add it as a new table.
-            table_dfs[f"table_{len(table_dfs) + 1}"] = df
+        fragments.setdefault(frozenset(df.columns), []).append(df)
 
+    table_dfs = {
+        f"table_{i}": pd.concat(dfs, ignore_index=True)
+        for i, dfs in enumerate(fragments.values(), start=1)
+    }
     return table_dfs
 
 
 def extract_gpa(df, column_name):
     """Extracts and standardizes GPA values from a specified DataFrame column.
 
+    The column is overwritten in place.
+
     Args:
         df (pd.DataFrame): The DataFrame containing the GPA data.
         column_name (str): The name of the column with GPA values.
@@ -44,38 +120,46 @@ def extract_gpa(df, column_name):
     """
     if column_name not in df.columns or df[column_name].dtype == 'float64':  # Early exit if not needed
         return df
-    def _standardize_gpa(value):
-        """Helper function to standardize GPA to a 4.0 scale."""
-        if isinstance(value, float):
-            return value  # Already a float, no need to process further
-        match = re.search(r"(\d+\.?\d*)\s*(?:\n*\s*out\s+of\s*\n*|/)(\d+\.?\d*)", str(value), re.IGNORECASE)
-        if match:
-            gpa, scale = map(float, match.groups())
-            return (gpa / scale) * 4 if scale != 4 else gpa
-        return np.nan  # Not a recognized GPA format
-    df = df.copy()  # Avoid modifying the original DataFrame
-    df[column_name] = df[column_name].astype(str).apply(_standardize_gpa)
+    # Split "X out of Y" / "X/Y" into GPA and scale columns; unrecognized formats become NaN.
+    parts = df[column_name].astype(str).str.extract(
+        r"(\d+\.?\d*)\s*(?:\n*\s*out\s+of\s*\n*|/)(\d+\.?\d*)", flags=re.IGNORECASE
+    ).astype(float)
+    gpa, scale = parts[0].to_numpy(), parts[1].to_numpy()
+    scale = np.where(scale > 0, scale, np.nan)  # A zero scale is not a usable GPA; avoid dividing by it
+    # Standardize to a 4.0 scale in place; the caller does not reuse the raw values.
+    df[column_name] = np.where(scale == 4, gpa, gpa / scale * 4.0)
     return df
 
 
-def extract_applicant_info(file_path):
-    """Extracts applicant name and publication counts from a PDF."""
-    with open(file_path, 'rb') as file:
-        text = "".join(page.extract_text() for page in PyPDF2.PdfReader(file).pages)
+def extract_applicant_info(file_path, submission_id):
+    """Extracts applicant name and publication counts from a PDF.
 
-    name = re.search(r"Name\s*:\s*(.*)", text).group(1) if re.search(r"Name\s*:\s*(.*)", text) else None
+    The submission number is taken from the file name by the caller and passed in as submission_id.
+    """
+    found = {}
+    with open(file_path, 'rb') as file:
+        # The fields normally sit on the first page, so stop at the first page that completes them.
+        for page in pypdf.PdfReader(file).pages:
+            # Try the raw content stream first, which skips extract_text's layout work.
+            contents = page.get_contents()
+            raw = contents.get_data() if contents is not None else b""
+            for key, regex in _RAW_FIELDS.items():
+                if key not in found and (match := regex.search(raw)):
+                    found[key] = match.group(1).decode("ascii")
 
-    def _extract_publication_count(pattern):
-        match = re.search(pattern, text)
-        return int(match.group(1)) if match else 0
+            if len(found) < len(_FIELDS):
+                text = page.extract_text() or ""
+                for key, regex in _FIELDS.items():
+                    if key not in found and (match := regex.search(text)):
+                        found[key] = match.group(1)
+            if len(found) == len(_FIELDS):
+                break
 
     return {
-        "Name": name,
-        "Publications_National": _extract_publication_count(r"No\. of Publication National\s*:\s*(\d+)"),
-        "Publications_International": _extract_publication_count(r"No\. of Publication International\s*:\s*(\d+)"),
-        "Submission #": re.search(r"erecruitment-submission-(\d+)\.pdf", file_path).group(1)
-        if re.search(r"erecruitment-submission-(\d+)\.pdf", file_path)
-        else None,
+        "Name": found.get("Name"),
+        "Publications_National": int(found.get("Publications_National", 0)),
+        "Publications_International": int(found.get("Publications_International", 0)),
+        "Submission #": submission_id,
     }
 
 
@@ -83,53 +167,173 @@ def get_grad_postgrad_data(tables_dict):
     """Calculates aggregated GPA and affiliation data for graduate and postgraduate levels."""
     # print(tables_dict['table_1'].keys)
     extracted_df = extract_gpa(tables_dict['table_1'], 'Result')
-    grad_postgrad_df = extracted_df[
-        extracted_df['Level'].isin(['Graduation', 'Postgraduation'])
-    ][['Level', 'Name of\rInstitution', 'Result']]
+    # Plain object array whatever Level's dtype; missing levels become None so masks stay boolean.
+    levels = extracted_df['Level'].to_numpy(dtype=object, na_value=None)
+    results = extracted_df['Result'].to_numpy(dtype=float)
+    institutions = extracted_df['Name of\rInstitution'].to_numpy()
 
-    def _agg_func(series):
-        if pd.api.types.is_numeric_dtype(series):
-            return series.mean()
-        elif pd.api.types.is_string_dtype(series):
-            return ', '.join(series.dropna())
-        return np.nan
-
-    agg_data = grad_postgrad_df.groupby('Level').agg(_agg_func).T.loc['Result']
+    # There are at most two levels of interest, so plain boolean masks replace a groupby.
+    gpas = {}
+    affiliations = []
+    for level in ('Graduation', 'Postgraduation'):
+        mask = levels == level
+        if not mask.any():
+            continue
+        level_results = results[mask]
+        level_results = level_results[~np.isnan(level_results)]
+        gpas[level] = level_results.mean() if level_results.size else np.nan
+        level_institutions = institutions[mask]
+        affiliations.append(', '.join(level_institutions[~pd.isna(level_institutions)]))
 
     return {
-        "Graduation GPA": agg_data.get('Graduation', np.nan),
-        "Postgraduation GPA": agg_data.get('Postgraduation', np.nan),
-        "Affiliations": grad_postgrad_df.groupby('Level').agg(_agg_func).T.loc['Name of\rInstitution'].tolist(),
+        "Graduation GPA": gpas.get('Graduation', np.nan),
+        "Postgraduation GPA": gpas.get('Postgraduation', np.nan),
+        "Affiliations": affiliations,
     }
 
+
+def _batch_extract_tables(file_paths, export_dir):
+    """Converts the given PDFs with a single tabula run, writing JSON exports into export_dir.
+
+    Returns a dict mapping each PDF path to its export; PDFs tabula wrote nothing for are left out.
+    """
+    # tabula's batch mode converts a whole directory, so stage just these files in one.
+    for file_path in file_paths:
+        staged_path = os.path.join(export_dir, os.path.basename(file_path))
+        try:
+            os.symlink(os.path.abspath(file_path), staged_path)
+        except OSError:
+            shutil.copyfile(file_path, staged_path)
+
+    tabula.convert_into_by_batch(export_dir, output_format="json", pages="all", lattice=True)
+
+    exports = {}
+    for file_path in file_paths:
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        export_path = os.path.join(export_dir, stem + ".json")
+        if os.path.exists(export_path):
+            exports[file_path] = export_path
+    return exports
+
+
+def _cache_path(file_path):
+    """Returns the path of the cached result for a PDF, keyed by its content hash."""
+    with open(file_path, "rb") as file:
+        digest = hashlib.blake2b(file.read())
+    # The submission number is read from the file name, so it belongs in the key as well.
+    digest.update(os.path.basename(file_path).encode())
+    digest.update(str(_CACHE_VERSION).encode())
+    return os.path.join(_cache_dir, f"{digest.hexdigest()}.json")
+
+
+def _read_cache(cache_path):
+    """Returns the cached result at cache_path, or None if there is no readable one."""
+    # An unreadable cache file (e.g. truncated by a killed run) is treated as a miss.
+    try:
+        with open(cache_path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def process_one_pdf(file_path, submission_id, cache_path, json_path=None):
+    """Extracts the combined applicant and GPA data from one PDF, or None if it fails.
+
+    The result is cached at cache_path, so main can skip the PDF on later runs while it is unchanged.
+    json_path is the PDF's tabula export from the batch conversion, if there is one.
+    """
+    print(f'Starting reading of file {file_path}')
+    try:
+        tables_dict = extract_tables_from_pdf(file_path, json_path)
+        # print(tables_dict)
+        applicant_info = extract_applicant_info(file_path, submission_id)
+
+        # Ensure 'table_1' exists for the get_grad_postgrad_data function
+        if 'table_1' in tables_dict:
+            grad_postgrad_data = get_grad_postgrad_data(tables_dict)
+        else:
+            grad_postgrad_data = {"Graduation GPA": np.nan, "Postgraduation GPA": np.nan, "Affiliations": []}
+
+        combined_data = applicant_info | grad_postgrad_data
+    except Exception as e:
+        print(f"Error processing {os.path.basename(file_path)}: {e}")
+        return None
+
+    # Write to a temporary file and rename it into place, so the cache never holds a partial result.
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(combined_data, file)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Could not cache result for {os.path.basename(file_path)}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return combined_data
+
 # Main execution
 def main():
     folder_path = input("Enter the path to the folder containing PDF files: ")
 
-    all_results = []
+    if not _HAS_JPYPE:
+        print("jpype is not installed; tabula will start a new JVM for every call (pip install 'tabula-py[jpype]').")
+
+    # Only erecruitment submissions are parsed; the submission number comes from the file name.
+    files, submission_ids = [], []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not (entry.is_file() and entry.name.endswith(".pdf")):
+                continue
+            match = _FNAME_RE.search(entry.name)
+            if match:
+                files.append(entry.path)
+                submission_ids.append(match.group(1))
+            else:
+                print(f"Skipping {entry.name}: not an erecruitment submission file")
+
+    os.makedirs(_cache_dir, exist_ok=True)
+    cache_paths = [_cache_path(file_path) for file_path in files]
+
+    cached_results = [_read_cache(cache_path) for cache_path in cache_paths]
+    misses = [i for i, cached_result in enumerate(cached_results) if cached_result is None]
+    uncached = [files[i] for i in misses]
 
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".pdf"):
-            file_path = os.path.join(folder_path, filename)
-            print(f'Starting reading of file {file_path}')
+    # Convert the PDFs without a cached result in a single tabula (JVM) run instead of one per file.
+    with tempfile.TemporaryDirectory() as export_dir:
+        exports = {}
+        if uncached:
             try:
-                tables_dict = extract_tables_from_pdf(file_path)
-                # print(tables_dict)
-                applicant_info = extract_applicant_info(file_path)
-
-                # Ensure 'table_1' exists for the get_grad_postgrad_data function
-                if 'table_1' in tables_dict:
-                    grad_postgrad_data = get_grad_postgrad_data(tables_dict)
-                else:
-                    grad_postgrad_data = {"Graduation GPA": np.nan, "Postgraduation GPA": np.nan, "Affiliations": []}
-
-                combined_data = applicant_info | grad_postgrad_data
-                all_results.append(combined_data)
+                exports = _batch_extract_tables(uncached, export_dir)
             except Exception as e:
-                print(f"Error processing {filename}: {e}")
+                print(f"Batch table extraction failed, falling back to per-file extraction: {e}")
 
-    df = pd.DataFrame(all_results)
-    df.to_csv("applicant_data.csv", index=False)
+        # Spawn, not fork, the workers: a JVM started above by jpype does not survive a fork.
+        executor = (
+            ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+            if misses else contextlib.nullcontext()
+        )
+        with open("applicant_data.csv", "w", newline="", encoding="utf-8") as output, executor:
+            writer = csv.DictWriter(output, fieldnames=_OUTPUT_FIELDS)
+            writer.writeheader()
+            # Only cache misses go to the pool; rows are streamed out in input order.
+            fresh_results = iter(())
+            if misses:
+                fresh_results = executor.map(
+                    process_one_pdf,
+                    uncached,
+                    [submission_ids[i] for i in misses],
+                    [cache_paths[i] for i in misses],
+                    [exports.get(file_path) for file_path in uncached],
+                )
+            for cached_result in cached_results:
+                result = cached_result if cached_result is not None else next(fresh_results)
+                if result:
+                    # Leave missing GPAs empty, as pandas' to_csv did.
+                    writer.writerow({
+                        key: "" if isinstance(value, float) and np.isnan(value) else value
+                        for key, value in result.items()
+                    })
+                    output.flush()
     print("Data saved to applicant_data.csv")
 
 if __name__ == "__main__":